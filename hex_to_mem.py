@@ -4,30 +4,37 @@ Convert Intel HEX format to simple memory format for VHDL
 Outputs one hex byte per line (without 0x prefix)
 """
 
+import numpy as np
+
+# Precomputed byte -> "XX" strings so the output dump is one join, not
+# one f-string per byte
+HEX_LINES = np.array([f"{i:02X}" for i in range(256)])
+
 def parse_intel_hex(hex_file):
     """Parse Intel HEX format and return dictionary of address:data"""
     memory = {}
     max_addr = 0
 
-    with open(hex_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line.startswith(':'):
-                continue
-
-            # Parse Intel HEX record
-            byte_count = int(line[1:3], 16)
-            address = int(line[3:7], 16)
-            record_type = int(line[7:9], 16)
-
-            if record_type == 0x00:  # Data record
-                data_start = 9
-                for i in range(byte_count):
-                    byte_val = int(line[data_start + i*2:data_start + i*2 + 2], 16)
-                    memory[address + i] = byte_val
-                    max_addr = max(max_addr, address + i)
-            elif record_type == 0x01:  # End of file
-                break
+    # Read the whole file as bytes; splitlines is a single memchr-style
+    # scan and keeps the records zero-copy all the way through
+    with open(hex_file, 'rb') as f:
+        buf = f.read()
+
+    for line in buf.splitlines():
+        if not line.startswith(b':'):
+            continue
+
+        # Parse Intel HEX record header (count, addr hi/lo, type) in one call
+        byte_count, addr_hi, addr_lo, record_type = bytes.fromhex(line[1:9].decode())
+        address = (addr_hi << 8) | addr_lo
+
+        if record_type == 0x00 and byte_count > 0:  # Data record
+            data_bytes = bytes.fromhex(line[9:9 + byte_count * 2].decode())
+            memory.update(zip(range(address, address + byte_count), data_bytes))
+            # Records are contiguous, so one comparison per record suffices
+            max_addr = max(max_addr, address + byte_count - 1)
+        elif record_type == 0x01:  # End of file
+            break
 
     return memory, max_addr
 
@@ -43,13 +50,13 @@ if __name__ == "__main__":
 
     memory, max_addr = parse_intel_hex(hex_file)
 
-    # Write memory file - one hex byte per line
+    # Write memory file - one hex byte per line, gaps filled with 0x00
+    arr = np.zeros(max_addr + 1, dtype=np.uint8)
+    arr[list(memory.keys())] = list(memory.values())
+
     with open(mem_file, 'w') as f:
-        for addr in range(max_addr + 1):
-            if addr in memory:
-                f.write(f"{memory[addr]:02X}\n")
-            else:
-                f.write("00\n")  # Fill gaps with 0x00
+        f.write('\n'.join(HEX_LINES[arr]))
+        f.write('\n')
 
     print(f"Converted {hex_file} -> {mem_file}")
     print(f"  Loaded {len(memory)} bytes")
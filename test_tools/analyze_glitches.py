@@ -8,44 +8,31 @@ Looks for:
 3. State glitches
 """
 
-import csv
 import sys
 
-# State encoding: S2 S1 S0
-STATES = {
-    '010': 'T1',
-    '100': 'T2',
-    '001': 'T3',
-    '110': 'T1I',
-    '011': 'STOPPED',
-    '111': 'T4',
-    '101': 'T5',
-    '000': 'TWAIT'
-}
-
-def parse_csv(filename):
-    """Parse CSV and return data rows."""
-    with open(filename, 'r') as f:
-        lines = f.readlines()
-
-    # Find header line
-    data_start = 0
-    for i, line in enumerate(lines):
-        if line.startswith('Time'):
-            data_start = i
-            break
-
-    return list(csv.DictReader(lines[data_start:]))
-
-def get_data_byte(row):
-    """Extract data bus value from row (D7=MSB, D0=LSB)."""
-    bits = ''.join([row[f' D{i}'].strip() for i in range(7, -1, -1)])
-    return int(bits, 2) if '?' not in bits else None
-
-def get_state(row):
-    """Get state from S2 S1 S0."""
-    bits = row[' S2'].strip() + row[' S1'].strip() + row[' S0'].strip()
-    return STATES.get(bits, f'UNKNOWN({bits})')
+import numpy as np
+
+from trace_common import load_capture, njit, rising_edges
+
+@njit(cache=True)
+def find_data_glitch_flags(edges, data_arr):
+    """Flag edges whose preceding state segment has >1 distinct data value."""
+    flags = np.zeros(len(edges), np.uint8)
+    seg_start = 0
+    for k in range(len(edges)):
+        i = edges[k]
+        first = -1
+        for j in range(seg_start, i):
+            v = data_arr[j]
+            if v < 0:  # unknown bits
+                continue
+            if first < 0:
+                first = v
+            elif v != first:
+                flags[k] = 1
+                break
+        seg_start = i
+    return flags
 
 def analyze_glitches(csv_file, start_time_us=None, end_time_us=None):
     """Analyze CSV for bus contention and glitches."""
@@ -53,77 +40,84 @@ def analyze_glitches(csv_file, start_time_us=None, end_time_us=None):
     print(f"Analyzing {csv_file}")
     print("=" * 80)
 
-    rows = parse_csv(csv_file)
+    cap = load_capture(csv_file)
+
+    times_us = cap.time * 1e6
+    sync_col = cap.sync
+    codes = cap.state_code
+    states = cap.state_name
+    data_arr = cap.data
+    cp_col = cap.cp_d_en
 
-    # Filter by time range if specified
+    # Filter by time range if specified (times are monotonic)
     if start_time_us is not None or end_time_us is not None:
-        filtered = []
-        for row in rows:
-            time_s = float(row['Time(s)'])
-            time_us = time_s * 1e6
-            if start_time_us is not None and time_us < start_time_us:
-                continue
-            if end_time_us is not None and time_us > end_time_us:
-                break
-            filtered.append(row)
-        rows = filtered
+        lo = 0 if start_time_us is None else int(np.searchsorted(times_us, start_time_us, side='left'))
+        hi = len(times_us) if end_time_us is None else int(np.searchsorted(times_us, end_time_us, side='right'))
+        times_us = times_us[lo:hi]
+        sync_col = sync_col[lo:hi]
+        codes = codes[lo:hi]
+        states = states[lo:hi]
+        data_arr = data_arr[lo:hi]
+        cp_col = cp_col[lo:hi]
         print(f"Filtered to time range: {start_time_us}us - {end_time_us}us")
-        print(f"Samples: {len(rows)}")
+        print(f"Samples: {len(times_us)}")
         print("=" * 80)
 
-    # Track state for glitch detection
-    prev_sync = None
-    prev_state = None
-    prev_data = None
-    prev_cp_d_en = None
+    # Edges are recomputed here (not taken from cap.sync_rising) because the
+    # time filter above shifts indices; CP_D_EN mid-state changes are found
+    # in the same vectorized style
+    rising_idx = rising_edges((sync_col == '1').view(np.uint8))
 
-    current_state_start = 0
-    state_data_values = []
+    cp_glitch_idx = np.flatnonzero((cp_col[1:] != cp_col[:-1]) &
+                                   (sync_col[1:] == sync_col[:-1]) &
+                                   (sync_col[1:] != '?')) + 1
 
-    glitch_count = 0
+    # Merge both event kinds in row order (state check first on equal rows,
+    # matching the original row-by-row scan)
+    events = sorted([(int(i), 0) for i in rising_idx] +
+                    [(int(i), 1) for i in cp_glitch_idx])
+
+    # The segment scan runs native (numba); Python only formats reports
+    # for the (rare) flagged edges
+    glitch_flags = find_data_glitch_flags(rising_idx, data_arr)
 
-    for i, row in enumerate(rows):
-        time_s = float(row['Time(s)'])
-        time_us = time_s * 1e6
-
-        sync = row[' SYNC'].strip()
-        state = get_state(row)
-        data = get_data_byte(row)
-        cp_d_en = row[' CP_D_EN'].strip()
-
-        # Detect state transition (SYNC rising edge)
-        if sync == '1' and prev_sync == '0':
-            # Check for data glitches within previous state
-            if len(state_data_values) > 1:
-                unique_values = set(state_data_values)
-                if len(unique_values) > 1:
-                    glitch_count += 1
-                    print(f"\n*** GLITCH #{glitch_count} at ~{time_us:.1f}us ***")
-                    print(f"  State: {prev_state}")
-                    print(f"  Multiple data values within same state:")
-                    for val in unique_values:
-                        count = state_data_values.count(val)
-                        print(f"    0x{val:02X} ({val:08b}) - {count} samples")
-                    print(f"  Line range: {current_state_start} - {i}")
+    current_state_start = 0
+    prev_state = None
+    glitch_count = 0
+    edge_pos = 0
+    out = []
+
+    for i, kind in events:
+        time_us = times_us[i]
+
+        if kind == 0:
+            if glitch_flags[edge_pos]:
+                # Multiple distinct data values within the previous state
+                seg = data_arr[current_state_start:i]
+                unique_values, counts = np.unique(seg[seg >= 0], return_counts=True)
+                glitch_count += 1
+                out.append(f"\n*** GLITCH #{glitch_count} at ~{time_us:.1f}us ***")
+                out.append(f"  State: {prev_state}")
+                out.append(f"  Multiple data values within same state:")
+                for val, count in zip(unique_values, counts):
+                    out.append(f"    0x{val:02X} ({val:08b}) - {count} samples")
+                out.append(f"  Line range: {current_state_start} - {i}")
 
             # Start new state
+            edge_pos += 1
             current_state_start = i
-            state_data_values = []
-            prev_state = state
-
-        # Track data values within current state
-        if data is not None:
-            state_data_values.append(data)
-
-        # Check for CP_D_EN glitches (should be stable during state)
-        if cp_d_en != prev_cp_d_en and prev_sync == sync and sync != '?':
-            print(f"\n*** CP_D_EN GLITCH at {time_us:.1f}us (line {i}) ***")
-            print(f"  CP_D_EN changed from {prev_cp_d_en} to {cp_d_en}")
-            print(f"  State: {state}, SYNC: {sync}")
-
-        prev_sync = sync
-        prev_data = data
-        prev_cp_d_en = cp_d_en
+            prev_state = states[i]
+
+        else:
+            # CP_D_EN changed without a SYNC transition (should be stable)
+            out.append(f"\n*** CP_D_EN GLITCH at {time_us:.1f}us (line {i}) ***")
+            out.append(f"  CP_D_EN changed from {cp_col[i - 1]} to {cp_col[i]}")
+            out.append(f"  State: {states[i]}, SYNC: {sync_col[i]}")
+
+    # One buffered flush instead of a print() (and newline flush) per event
+    if out:
+        sys.stdout.write('\n'.join(out))
+        sys.stdout.write('\n')
 
     print(f"\n{'=' * 80}")
     print(f"Total glitches found: {glitch_count}")
@@ -4,7 +4,8 @@ Find all INT rising edges in a CSV capture
 """
 
 import sys
-import csv
+
+from trace_common import load_capture
 
 if len(sys.argv) < 2:
     print("Usage: python3 find_int_edges.py <csv_file>")
@@ -12,36 +13,11 @@ if len(sys.argv) < 2:
 
 csv_file = sys.argv[1]
 
-# Skip comment lines, find header
-with open(csv_file, 'r') as f:
-    for line in f:
-        if line.startswith('Time(s)'):
-            header = [col.strip() for col in line.split(',')]
-            break
-
-# Find INT rising edges
-int_high_times = []
-with open(csv_file, 'r') as f:
-    # Skip to data
-    for line in f:
-        if line.startswith('Time(s)'):
-            break
-
-    # Parse data
-    reader = csv.DictReader(f, fieldnames=header)
-    prev_int = '0'
-    line_num = 6  # Start after header
-
-    for row in reader:
-        line_num += 1
-        int_val = row['INT'].strip()
-        time = float(row['Time(s)'].strip())
-
-        # Find rising edges (0->1 transitions)
-        if int_val == '1' and prev_int == '0':
-            int_high_times.append((line_num, time))
+# Only Time and INT get parsed; load_capture finds the rising edges
+cap = load_capture(csv_file, usecols=['Time(s)', 'INT'])
 
-        prev_int = int_val
+# First data row sits two file lines below the header index (1-based)
+int_high_times = [(int(i) + cap.header_idx + 2, cap.time[i]) for i in cap.int_rising]
 
 print(f'Found {len(int_high_times)} INT rising edges:')
 for i, (line, t) in enumerate(int_high_times):
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Shared capture loading and decoding for the trace tools.
+
+Every tool in this directory reads the same logic-analyzer CSV format.
+load_capture() does the whole columnar decode in one place: pandas/mmap
+read, S2S1S0 state-code decode, D-bus byte assembly, and SYNC/INT
+rising-edge detection.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to the interpreted loop
+    def njit(**kwargs):
+        def deco(func):
+            return func
+        return deco
+
+# State names indexed by the code (S2<<2)|(S1<<1)|S0; code 8 is the
+# sentinel for samples whose S bits read '?'
+STATE_NAMES = np.array(['TWAIT', 'T3', 'T1', 'STOPPED', 'T2', 'T5', 'T1I', 'T4', 'UNK'])
+
+UNK_CODE = 0b1000
+
+T1_CODE = 0b010
+T2_CODE = 0b100
+T3_CODE = 0b001
+T1I_CODE = 0b110
+
+def parse_csv(filename, usecols=None):
+    """Parse CSV into a DataFrame of string columns."""
+    # Find the header line by streaming; no need to materialize the file
+    with open(filename, 'r') as f:
+        data_start = next((i for i, line in enumerate(f) if line.startswith('Time')), 0)
+
+    # C tokenizer strips the per-cell whitespace, so columns are 'D0' not ' D0';
+    # memory_map lets it read straight from the mapped pages of large captures
+    return pd.read_csv(filename, skiprows=data_start, skipinitialspace=True,
+                       usecols=usecols, dtype=str, na_filter=False,
+                       engine='c', memory_map=True), data_start
+
+def decode_data(df):
+    """Decode the 8 D columns into one int16 array (-1 where any bit is '?')."""
+    data = np.zeros(len(df), dtype=np.int16)
+    unknown = np.zeros(len(df), dtype=bool)
+    for i in range(8):
+        col = df[f'D{i}'].to_numpy()
+        data |= (col == '1').astype(np.int16) << i
+        unknown |= (col == '?')
+    data[unknown] = -1
+    return data
+
+def decode_states(df):
+    """Decode S2 S1 S0 columns into a code array and a name array."""
+    s2 = df['S2'].to_numpy()
+    s1 = df['S1'].to_numpy()
+    s0 = df['S0'].to_numpy()
+    codes = (((s2 == '1').view(np.uint8) << 2) |
+             ((s1 == '1').view(np.uint8) << 1) |
+             (s0 == '1').view(np.uint8))
+    codes[(s2 == '?') | (s1 == '?') | (s0 == '?')] = UNK_CODE
+    return codes, STATE_NAMES[codes]
+
+def rising_edges(u8):
+    """Indices where a 0/1 signal goes 0 -> 1 (row 0 never counts)."""
+    return np.flatnonzero((u8[1:] == 1) & (u8[:-1] == 0)) + 1
+
+def load_capture(path, usecols=None):
+    """Load a capture CSV and pre-decode the columns the trace tools share.
+
+    Returns a SimpleNamespace of ndarrays: time (seconds), state_code and
+    state_name, data (-1 = unknown bits), the raw sync/cp_d_en/int_sig
+    columns, and sync_rising/int_rising edge indices. header_idx is the
+    0-based file line of the CSV header. Signals excluded via usecols are
+    simply absent from the namespace.
+    """
+    df, header_idx = parse_csv(path, usecols)
+
+    cap = SimpleNamespace(header_idx=header_idx)
+    cap.time = df['Time(s)'].to_numpy(np.float64)
+
+    if 'S0' in df.columns:
+        cap.state_code, cap.state_name = decode_states(df)
+    if 'D0' in df.columns:
+        cap.data = decode_data(df)
+    if 'SYNC' in df.columns:
+        cap.sync = df['SYNC'].to_numpy()
+        cap.sync_rising = rising_edges((cap.sync == '1').view(np.uint8))
+    if 'CP_D_EN' in df.columns:
+        cap.cp_d_en = df['CP_D_EN'].to_numpy()
+    if 'INT' in df.columns:
+        cap.int_sig = df['INT'].to_numpy()
+        # INT edge detection keeps its historical prev='0' seed, so a high
+        # first sample counts as an edge
+        int_u8 = (cap.int_sig == '1').astype(np.uint8)
+        cap.int_rising = np.flatnonzero(np.diff(int_u8, prepend=0) == 1)
+    return cap
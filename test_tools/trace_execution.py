@@ -4,44 +4,11 @@ Trace instruction execution from logic analyzer CSV.
 Shows instruction fetches and data after interrupt acknowledge.
 """
 
-import csv
 import sys
 
-# State encoding: S2 S1 S0
-STATES = {
-    '010': 'T1',
-    '100': 'T2',
-    '001': 'T3',
-    '110': 'T1I',
-    '011': 'STOPPED',
-    '111': 'T4',
-    '101': 'T5',
-    '000': 'TWAIT'
-}
-
-def parse_csv(filename):
-    """Parse CSV and return data rows."""
-    with open(filename, 'r') as f:
-        lines = f.readlines()
-
-    # Find header line
-    data_start = 0
-    for i, line in enumerate(lines):
-        if line.startswith('Time'):
-            data_start = i
-            break
-
-    return list(csv.DictReader(lines[data_start:]))
-
-def get_data_byte(row):
-    """Extract data bus value (D7=MSB, D0=LSB)."""
-    bits = ''.join([row[f' D{i}'].strip() for i in range(7, -1, -1)])
-    return int(bits, 2) if '?' not in bits else None
-
-def get_state(row):
-    """Get state from S2 S1 S0."""
-    bits = row[' S2'].strip() + row[' S1'].strip() + row[' S0'].strip()
-    return STATES.get(bits, f'UNKNOWN({bits})')
+import numpy as np
+
+from trace_common import T1_CODE, T1I_CODE, T3_CODE, load_capture
 
 def trace_execution(csv_file, max_instructions=30):
     """Trace execution starting from T1I."""
@@ -49,47 +16,59 @@ def trace_execution(csv_file, max_instructions=30):
     print(f"Tracing execution in {csv_file}")
     print("=" * 80)
 
-    rows = parse_csv(csv_file)
+    cap = load_capture(csv_file)
+
+    times_us = cap.time * 1e6
+    codes = cap.state_code
+    data_arr = cap.data
+    rising_idx = cap.sync_rising
 
-    prev_sync = None
-    after_t1i = False
+    # Classify the edges by state code once; only T1I/T1/T3 edges matter
+    edge_codes = codes[rising_idx]
+    t1i_pos = np.flatnonzero(edge_codes == T1I_CODE)
+
+    out = []
     instr_num = 0
-    current_instr = {'t1_line': None, 't1_data': None, 't3_line': None, 't3_data': None}
-
-    for i, row in enumerate(rows):
-        time_s = float(row['Time(s)'])
-        time_us = time_s * 1e6
-
-        state = get_state(row)
-        sync = row[' SYNC'].strip()
-        data = get_data_byte(row)
-
-        # Detect state transitions
-        if sync == '1' and prev_sync == '0':
-            if state == 'T1I':
-                after_t1i = True
-                print(f"\n{'='*80}")
-                print(f"Line {i}: T1I at {time_us:.1f}us - INTERRUPT ACKNOWLEDGED")
-                print(f"{'='*80}\n")
-
-            if after_t1i:
-                if state == 'T1':
-                    # Start new instruction
-                    if current_instr['t1_line'] is not None and current_instr['t3_data'] is not None:
-                        # Print previous instruction
-                        instr_num += 1
-                        print(f"#{instr_num:2d} @{current_instr['t1_line']:5d}: Opcode=0x{current_instr['t3_data']:02X}")
-
-                    current_instr = {'t1_line': i, 't1_data': data, 't3_line': None, 't3_data': None}
-
-                elif state == 'T3':
-                    current_instr['t3_line'] = i
-                    current_instr['t3_data'] = data
-
-                if instr_num >= max_instructions:
-                    break
-
-        prev_sync = sync
+
+    if len(t1i_pos) > 0:
+        start = int(t1i_pos[0])
+        t1_pos = np.flatnonzero(edge_codes == T1_CODE)
+        t1_pos = t1_pos[t1_pos > start]
+        t3_pos = np.flatnonzero(edge_codes == T3_CODE)
+
+        # An instruction is reported at the T1 edge that starts the next one,
+        # with the last T3 data byte fetched in between (same as the old
+        # row-at-a-time state machine)
+        last_t3 = np.searchsorted(t3_pos, t1_pos) - 1
+        events = []  # (edge_pos, t1_line, opcode); t1_line None = T1I banner
+        for k in range(1, len(t1_pos)):
+            j = last_t3[k]
+            if j >= 0 and t3_pos[j] > t1_pos[k - 1]:
+                opcode = int(data_arr[rising_idx[t3_pos[j]]])
+                if opcode >= 0:
+                    events.append((int(t1_pos[k]), int(rising_idx[t1_pos[k - 1]]), opcode))
+
+        # Early termination: everything past the max_instructions-th report
+        # is dropped, including later interrupt banners
+        events = events[:max_instructions]
+        stop = events[-1][0] if len(events) == max_instructions else len(edge_codes)
+        events += [(int(p), None, None) for p in t1i_pos if p <= stop]
+        events.sort(key=lambda e: e[0])
+
+        for pos, t1_line, opcode in events:
+            if t1_line is None:
+                i = int(rising_idx[pos])
+                out.append(f"\n{'='*80}")
+                out.append(f"Line {i}: T1I at {times_us[i]:.1f}us - INTERRUPT ACKNOWLEDGED")
+                out.append(f"{'='*80}\n")
+            else:
+                instr_num += 1
+                out.append(f"#{instr_num:2d} @{t1_line:5d}: Opcode=0x{opcode:02X}")
+
+    # One buffered flush instead of a print() (and newline flush) per event
+    if out:
+        sys.stdout.write('\n'.join(out))
+        sys.stdout.write('\n')
 
     print(f"\n{'='*80}")
     print(f"Traced {instr_num} instructions")
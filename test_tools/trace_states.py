@@ -4,51 +4,40 @@ Trace state-by-state execution with data bus values.
 Shows exactly what happens at each state transition.
 """
 
-import csv
 import sys
 
-# State encoding: S2 S1 S0
-STATES = {
-    '010': 'T1',
-    '100': 'T2',
-    '001': 'T3',
-    '110': 'T1I',
-    '011': 'STOPPED',
-    '111': 'T4',
-    '101': 'T5',
-    '000': 'TWAIT'
-}
-
-CYCLE_TYPES = {
-    '00': 'PCI',
-    '01': 'PCR',
-    '10': 'PCW',
-    '11': 'PCC'
-}
-
-def parse_csv(filename):
-    """Parse CSV and return data rows."""
-    with open(filename, 'r') as f:
-        lines = f.readlines()
-
-    # Find header line
-    data_start = 0
-    for i, line in enumerate(lines):
-        if line.startswith('Time'):
-            data_start = i
-            break
+import numpy as np
 
-    return list(csv.DictReader(lines[data_start:]))
+from trace_common import T1_CODE, T1I_CODE, T2_CODE, load_capture, njit
 
-def get_data_byte(row):
-    """Extract data bus value (D7=MSB, D0=LSB)."""
-    bits = ''.join([row[f' D{i}'].strip() for i in range(7, -1, -1)])
-    return int(bits, 2) if '?' not in bits else None
+# Cycle type names indexed by D7:D6 sampled during T2
+CYCLE_TYPE_NAMES = np.array(['PCI', 'PCR', 'PCW', 'PCC'])
 
-def get_state(row):
-    """Get state from S2 S1 S0."""
-    bits = row[' S2'].strip() + row[' S1'].strip() + row[' S0'].strip()
-    return STATES.get(bits, f'UNK({bits})')
+@njit(cache=True)
+def scan_edges(rising_idx, times_us, codes, start_us, end_us, t1, t1i):
+    """Number the states/cycles at each edge inside the trace window."""
+    n = len(rising_idx)
+    sel = np.empty(n, np.int64)
+    state_nums = np.empty(n, np.int64)
+    cycle_nums = np.empty(n, np.int64)  # 0 when the edge opens no cycle
+    count = 0
+    cycle_num = 0
+    for k in range(n):
+        i = rising_idx[k]
+        if times_us[i] < start_us:
+            continue
+        if times_us[i] > end_us:
+            break
+        code = codes[i]
+        if code == t1 or code == t1i:
+            cycle_num += 1
+            cycle_nums[count] = cycle_num
+        else:
+            cycle_nums[count] = 0
+        sel[count] = i
+        state_nums[count] = count + 1
+        count += 1
+    return sel[:count], state_nums[:count], cycle_nums[:count]
 
 def trace_states(csv_file, start_us, end_us):
     """Trace state-by-state with data bus values."""
@@ -56,53 +45,47 @@ def trace_states(csv_file, start_us, end_us):
     print(f"Tracing states in {csv_file} from {start_us}us to {end_us}us")
     print("=" * 90)
 
-    rows = parse_csv(csv_file)
-
-    prev_sync = None
-    prev_state = None
-    state_num = 0
-    cycle_num = 0
-
-    for i, row in enumerate(rows):
-        time_s = float(row['Time(s)'])
-        time_us = time_s * 1e6
-
-        if time_us < start_us:
-            prev_sync = row[' SYNC'].strip()
-            continue
-        if time_us > end_us:
-            break
-
-        state = get_state(row)
-        sync = row[' SYNC'].strip()
-        data = get_data_byte(row)
-        cp_d_en = row[' CP_D_EN'].strip()
-        int_sig = row[' INT'].strip()
-
-        # Detect state transitions (SYNC rising edge)
-        if sync == '1' and prev_sync == '0':
-            state_num += 1
-
-            # Track cycle boundaries (T1 starts new cycle)
-            if state == 'T1' or state == 'T1I':
-                cycle_num += 1
-                print(f"\n--- Cycle #{cycle_num} ---")
-
-            # Get cycle type from D7:D6 during T2
-            cycle_type = "?"
-            if state == 'T2' and data is not None:
-                ct_bits = f"{(data >> 6) & 0x3:02b}"
-                cycle_type = CYCLE_TYPES.get(ct_bits, f"?({ct_bits})")
-
-            print(f"State #{state_num:3d} @ {time_us:6.1f}us: {state:6s}  Data=0x{data:02X}  " +
-                  f"CP_D_EN={cp_d_en}  INT={int_sig}" +
-                  (f"  CycleType={cycle_type}" if state == 'T2' else ""))
-
-        prev_sync = sync
-        prev_state = state
+    cap = load_capture(csv_file)
+
+    times_us = cap.time * 1e6
+    codes = cap.state_code
+    states = cap.state_name
+    data_arr = cap.data
+    cp_col = cap.cp_d_en
+    int_col = cap.int_sig
+    rising_idx = cap.sync_rising
+
+    # Pre-decode the cycle type (D7:D6, only shown during T2) for every
+    # sample too, so the event loop below just formats precomputed values
+    cycle_types = np.where(data_arr >= 0,
+                           CYCLE_TYPE_NAMES[(data_arr >> 6) & 0x3], '?')
+
+    # The windowing/numbering kernel runs native (numba); only the string
+    # formatting stays in Python
+    sel, state_nums, cycle_nums = scan_edges(rising_idx, times_us, codes,
+                                             start_us, end_us,
+                                             T1_CODE, T1I_CODE)
+
+    out = []
+    for k in range(len(sel)):
+        i = sel[k]
+        code = codes[i]
+
+        # Track cycle boundaries (T1 starts new cycle)
+        if cycle_nums[k]:
+            out.append(f"\n--- Cycle #{cycle_nums[k]} ---")
+
+        out.append(f"State #{state_nums[k]:3d} @ {times_us[i]:6.1f}us: {states[i]:6s}  Data=0x{data_arr[i]:02X}  " +
+                   f"CP_D_EN={cp_col[i]}  INT={int_col[i]}" +
+                   (f"  CycleType={cycle_types[i]}" if code == T2_CODE else ""))
+
+    # One buffered flush instead of a print() (and newline flush) per event
+    if out:
+        sys.stdout.write('\n'.join(out))
+        sys.stdout.write('\n')
 
     print(f"\n{'=' * 90}")
-    print(f"Traced {state_num} states, {cycle_num} cycles")
+    print(f"Traced {len(sel)} states, {cycle_nums.max() if len(sel) else 0} cycles")
 
 if __name__ == '__main__':
     if len(sys.argv) < 4: